@@ -13,92 +13,191 @@ import sys
 from typing import Dict, Optional
 
 import httpx
+from cryptography.hazmat.primitives.asymmetric import ed25519
 from dotenv import load_dotenv
 
-from signed_fetch import make_signed_headers
+from profiling import RunProfiler, finish, phase, request_extensions
+from signed_fetch import make_signed_headers, normalize_authority
 
 
 def load_config() -> Dict[str, str]:
     """Load configuration from environment."""
-    load_dotenv()
-    
-    config = {
-        'private_key_pem': os.getenv('OBA_PRIVATE_KEY_PEM', ''),
-        'kid': os.getenv('OBA_KID', ''),
-        'sig_agent_url': os.getenv('OBA_SIGNATURE_AGENT_URL', ''),
-        'demo_url': os.getenv('DEMO_URL', 'https://blog.attach.dev/?p=6'),
-    }
+    with phase('config_load'):
+        load_dotenv()
+        
+        config = {
+            'private_key_pem': os.getenv('OBA_PRIVATE_KEY_PEM', ''),
+            'kid': os.getenv('OBA_KID', ''),
+            'sig_agent_url': os.getenv('OBA_SIGNATURE_AGENT_URL', ''),
+            'demo_url': os.getenv('DEMO_URL', 'https://blog.attach.dev/?p=6'),
+        }
     
     return config
 
 
-def fetch_unsigned(url: str) -> httpx.Response:
+# Bodies smaller than this with no X-OBA-Decision are treated as teasers
+TEASER_MAX_BYTES = 5000
+
+
+def fetch_unsigned(url: str, client: Optional[httpx.Client] = None) -> httpx.Response:
     """
     Perform an unsigned HTTP request.
     
     Args:
         url: URL to fetch
+        client: Optional pooled httpx Client to reuse (default: one-shot client)
     
     Returns:
         httpx Response object
     """
-    headers = {
-        'User-Agent': 'OpenBotAuth-Demo-Agent/0.1.0 (unsigned)',
-    }
+    if client is not None:
+        return send_unsigned(client, 'GET', url)
     
     with httpx.Client(follow_redirects=False, timeout=10.0) as client:
-        response = client.get(url, headers=headers)
+        response = send_unsigned(client, 'GET', url)
     
     return response
 
 
-def fetch_signed(url: str, config: Dict[str, str]) -> httpx.Response:
+def fetch_signed(
+    url: str,
+    config: Dict[str, str],
+    client: Optional[httpx.Client] = None,
+    private_key: Optional[ed25519.Ed25519PrivateKey] = None,
+    follow_cross_authority: bool = True
+) -> httpx.Response:
     """
     Perform a signed HTTP request using RFC 9421.
     
     Args:
         url: URL to fetch
         config: Configuration dict with keys
+        client: Optional pooled httpx Client to reuse (default: one-shot client)
+        private_key: Optional pre-parsed key (default: parse config PEM per request)
+        follow_cross_authority: Follow a redirect to another host (see send_signed)
+    
+    Returns:
+        httpx Response object
+    """
+    if client is not None:
+        return send_signed(
+            client, 'GET', url, config, private_key,
+            follow_cross_authority=follow_cross_authority
+        )
+    
+    with httpx.Client(follow_redirects=False, timeout=10.0) as client:
+        response = send_signed(
+            client, 'GET', url, config, private_key,
+            follow_cross_authority=follow_cross_authority
+        )
+    
+    return response
+
+
+def send_unsigned(
+    client: httpx.Client,
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    stream: bool = False
+) -> httpx.Response:
+    """
+    Send an unsigned request on an open client.
+    
+    Args:
+        client: httpx Client to send on
+        method: HTTP method
+        url: URL to request
+        headers: Optional extra headers (e.g. Range)
+        stream: Leave the body unread; caller must close the response
     
     Returns:
         httpx Response object
     """
-    # Generate signed headers
-    signed_headers = make_signed_headers(
-        method='GET',
-        url=url,
-        kid=config['kid'],
-        sig_agent_url=config['sig_agent_url'],
-        privkey_pem=config['private_key_pem'],
+    request_headers = {
+        'User-Agent': 'OpenBotAuth-Demo-Agent/0.1.0 (unsigned)',
+        **(headers or {}),
+    }
+    request = client.build_request(
+        method, url, headers=request_headers, extensions=request_extensions()
     )
+    return client.send(request, stream=stream)
+
+
+def send_signed(
+    client: httpx.Client,
+    method: str,
+    url: str,
+    config: Dict[str, str],
+    private_key: Optional[ed25519.Ed25519PrivateKey] = None,
+    headers: Optional[Dict[str, str]] = None,
+    stream: bool = False,
+    follow_cross_authority: bool = True
+) -> httpx.Response:
+    """
+    Send a signed request on an open client, re-signing once on redirect.
+    
+    The method is part of the signature (@method), so HEAD and GET requests
+    are signed for the method actually sent.
+    
+    Args:
+        client: httpx Client to send on
+        method: HTTP method
+        url: URL to request
+        config: Configuration dict with keys
+        private_key: Optional pre-parsed key (default: parse config PEM per request)
+        headers: Optional extra headers, not covered by the signature (e.g. Range)
+        stream: Leave the body unread; caller must close the response
+        follow_cross_authority: If False, a redirect to a different authority
+            is not followed and the 3xx response is returned as is
+    
+    Returns:
+        httpx Response object
+    """
+    privkey = private_key or config['private_key_pem']
+    
+    def send(target: str) -> httpx.Response:
+        # Generate signed headers
+        signed_headers = make_signed_headers(
+            method=method,
+            url=target,
+            kid=config['kid'],
+            sig_agent_url=config['sig_agent_url'],
+            privkey_pem=privkey,
+        )
+        request = client.build_request(
+            method, target,
+            headers={**(headers or {}), **signed_headers},
+            extensions=request_extensions()
+        )
+        return client.send(request, stream=stream)
     
     # Perform request
-    with httpx.Client(follow_redirects=False, timeout=10.0) as client:
-        response = client.get(url, headers=signed_headers)
-        
-        # Handle redirects by re-signing for the new URL
-        if 300 <= response.status_code < 400:
-            location = response.headers.get('location')
-            if location:
-                # Make location absolute
-                if location.startswith('/'):
-                    from urllib.parse import urlparse
-                    parsed = urlparse(url)
-                    location = f"{parsed.scheme}://{parsed.netloc}{location}"
-                
-                print(f"  ↪️  Redirect to: {location} (re-signing...)")
-                
-                # Re-sign for new URL
-                new_signed_headers = make_signed_headers(
-                    method='GET',
-                    url=location,
-                    kid=config['kid'],
-                    sig_agent_url=config['sig_agent_url'],
-                    privkey_pem=config['private_key_pem'],
-                )
-                
-                # Follow redirect
-                response = client.get(location, headers=new_signed_headers)
+    response = send(url)
+    
+    # Handle redirects by re-signing for the new URL
+    if 300 <= response.status_code < 400:
+        location = response.headers.get('location')
+        if location:
+            # Make location absolute
+            if location.startswith('/'):
+                from urllib.parse import urlparse
+                parsed = urlparse(url)
+                location = f"{parsed.scheme}://{parsed.netloc}{location}"
+            
+            if not follow_cross_authority:
+                try:
+                    same_authority = normalize_authority(location) == normalize_authority(url)
+                except ValueError:
+                    same_authority = False
+                if not same_authority:
+                    return response
+            
+            print(f"  ↪️  Redirect to: {location} (re-signing...)")
+            
+            # Follow redirect with a signature for the new URL
+            response.close()
+            response = send(location)
     
     return response
 
@@ -155,11 +254,12 @@ def print_response(response: httpx.Response, mode: str):
     try:
         # Strip HTML tags for readability
         import re
-        text = response.text
-        text = re.sub(r'<script[^>]*>[\s\S]*?</script>', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'<style[^>]*>[\s\S]*?</style>', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
+        with phase('text_extract'):
+            text = response.text
+            text = re.sub(r'<script[^>]*>[\s\S]*?</script>', '', text, flags=re.IGNORECASE)
+            text = re.sub(r'<style[^>]*>[\s\S]*?</style>', '', text, flags=re.IGNORECASE)
+            text = re.sub(r'<[^>]+>', ' ', text)
+            text = re.sub(r'\s+', ' ', text).strip()
         
         preview = text[:200]
         
@@ -173,7 +273,7 @@ def print_response(response: httpx.Response, mode: str):
             content_label = '[DENIED]'
         elif response.status_code == 402:
             content_label = '[PAYMENT REQUIRED]'
-        elif body_bytes < 5000 and response.status_code == 200:
+        elif body_bytes < TEASER_MAX_BYTES and response.status_code == 200:
             content_label = '[TEASER - Small Response]'
         else:
             # No clear indication - report what we know
@@ -191,6 +291,40 @@ def print_response(response: httpx.Response, mode: str):
     print("-" * 70)
 
 
+def print_probe(result: Dict, mode: str):
+    """
+    Print a probe result in a compact form.
+    
+    Args:
+        result: Dict returned by probe.probe()
+        mode: 'unsigned' or 'signed'
+    """
+    mode_label = '🔓 UNSIGNED' if mode == 'unsigned' else '🔐 SIGNED'
+    
+    labels = {
+        'allow': '[FULL - Policy Allowed]',
+        'teaser': '[TEASER - Policy Enforced]',
+        'teaser_heuristic': '[TEASER - Small Response]',
+        'deny': '[DENIED]',
+        'payment_required': '[PAYMENT REQUIRED]',
+        'unenforced': '[⚠️  FULL CONTENT - Plugin not enforcing policies (missing X-OBA-Decision)]',
+        'error': '[ERROR]',
+    }
+    
+    print("\n" + "=" * 70)
+    print(f"  {mode_label} PROBE ({result['method']})")
+    print("=" * 70)
+    
+    print(f"\n📡 Status: {result['status']}")
+    if result['decision']:
+        print(f"  • X-OBA-Decision: {result['decision'].upper()}")
+    if result['size'] is not None:
+        print(f"  • Body size: {result['size']:,} bytes (read {result['bytes_read']:,})")
+    
+    print(f"\n{labels[result['classification']]}")
+    print("-" * 70)
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -206,6 +340,12 @@ Examples:
   
   # Custom URL
   python demo_agent.py --mode signed --url https://example.com/protected
+  
+  # Probe gating only (signed HEAD, no body download)
+  python demo_agent.py --mode signed --probe
+  
+  # Profile the run (writes profile.json, prints a summary)
+  python demo_agent.py --mode signed --profile
         """
     )
     
@@ -228,8 +368,38 @@ Examples:
         help='Show additional debug information'
     )
     
+    parser.add_argument(
+        '--probe',
+        nargs='?',
+        choices=['head', 'range'],
+        const='head',
+        help='Only classify gating via HEAD or Range: bytes=0-0 (default: head)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='profile.json',
+        metavar='PATH',
+        help='Profile the run and write a JSON report (default: profile.json)'
+    )
+    
     args = parser.parse_args()
     
+    if not args.profile:
+        run(args)
+        return
+    
+    profiler = RunProfiler()
+    profiler.start()
+    try:
+        run(args)
+    finally:
+        finish(profiler, args.profile)
+
+
+def run(args: argparse.Namespace):
+    """Fetch and report for parsed CLI arguments (exits with the result code)."""
     # Load config
     config = load_config()
     url = args.url or config['demo_url']
@@ -259,22 +429,33 @@ Examples:
     
     # Perform fetch
     try:
-        if args.mode == 'unsigned':
-            response = fetch_unsigned(url)
+        if args.probe:
+            from probe import probe
+            result = probe(url, args.mode, config, method=args.probe)
+            print_probe(result, args.mode)
+            
+            # A satisfied Range request (206) counts as 200 for the exit code
+            status_code = 200 if result['status'] == 206 else result['status']
+            oba_decision = result['decision'] or ''
         else:
-            response = fetch_signed(url, config)
-        
-        # Print results
-        print_response(response, args.mode)
-        
-        # Exit code based on result
-        if response.status_code == 200:
+            if args.mode == 'unsigned':
+                response = fetch_unsigned(url)
+            else:
+                response = fetch_signed(url, config)
+            
+            # Print results
+            print_response(response, args.mode)
+            
+            status_code = response.status_code
             oba_decision = response.headers.get('x-oba-decision', '')
+        
+        # Exit code based on result (same rules for fetch and probe)
+        if status_code == 200:
             if oba_decision == 'allow' or args.mode == 'signed':
                 sys.exit(0)  # Full access
             else:
                 sys.exit(2)  # Teaser
-        elif response.status_code == 402:
+        elif status_code == 402:
             sys.exit(2)  # Payment required
         else:
             sys.exit(1)  # Error
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+OpenBotAuth Signed Request Corpus Export
+
+Pre-signs a stream of requests for external load generators (vegeta, k6, wrk)
+that cannot run the Python signer. Request i is scheduled at
+start + i / rate and signed with `created` at that second, so signatures stay
+inside their validity window as the load test progresses. Every request gets
+its own nonce.
+
+Signing is spread across worker processes; each worker parses the private key
+once. Output is written in order, one request per line, as it is produced.
+With --profile, every worker is profiled and merged into a single report.
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from demo_agent import load_config
+from profiling import RunProfiler, finish, phase
+from sharded_runner import read_urls
+from signed_fetch import make_signed_headers, parse_pem_private_key
+
+
+FORMATS = ('vegeta', 'jsonl')
+
+# Requests signed per worker task
+CHUNK_SIZE = 2000
+
+# Per-worker state, set once by _init_worker()
+_worker: Dict = {}
+
+
+def _init_worker(
+    urls: List[str],
+    method: str,
+    rate: float,
+    start: float,
+    window: int,
+    fmt: str,
+    config: Dict[str, str],
+    profile: bool = False
+):
+    """Pool initializer: parse the key once and keep the export settings."""
+    if profile:
+        profiler = RunProfiler()
+        profiler.start()
+        _worker['profiler'] = profiler
+
+    with phase('pem_parse'):
+        private_key = parse_pem_private_key(config['private_key_pem'])
+
+    _worker.update({
+        'urls': urls,
+        'method': method,
+        'rate': rate,
+        'start': start,
+        'window': window,
+        'fmt': fmt,
+        'kid': config['kid'],
+        'sig_agent_url': config['sig_agent_url'],
+        'private_key': private_key,
+    })
+
+
+def _export_profile() -> Optional[Dict]:
+    """
+    Export this worker's profile so far and restart collection.
+
+    Pool workers have no exit hook, so profile data goes back to the parent
+    with every chunk instead.
+    """
+    profiler = _worker.get('profiler')
+    if profiler is None:
+        return None
+    profiler.stop()
+    data = profiler.export()
+    profiler = _worker['profiler'] = RunProfiler()
+    profiler.start()
+    return data
+
+
+def format_request(
+    fmt: str,
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    offset_ms: int
+) -> str:
+    """
+    Serialize one signed request as a single line.
+
+    Args:
+        fmt: 'vegeta' (vegeta -format=json targets) or 'jsonl' (generic,
+            includes the scheduled send offset for k6/wrk scripts)
+        method: HTTP method
+        url: Full URL
+        headers: Signed headers from make_signed_headers()
+        offset_ms: Scheduled send time relative to the corpus start
+
+    Returns:
+        Compact JSON line (no trailing newline)
+    """
+    if fmt == 'vegeta':
+        record = {
+            'method': method,
+            'url': url,
+            'header': {name: [value] for name, value in headers.items()},
+        }
+    else:
+        record = {
+            't': offset_ms,
+            'method': method,
+            'url': url,
+            'headers': headers,
+        }
+    return json.dumps(record, separators=(',', ':'))
+
+
+def _sign_chunk(bounds: Tuple[int, int]) -> Tuple[str, Optional[Dict]]:
+    """
+    Sign requests [first, last).
+
+    Returns:
+        Tuple of (newline-terminated lines, worker profile data or None)
+    """
+    first, last = bounds
+    urls = _worker['urls']
+    rate = _worker['rate']
+    start = _worker['start']
+
+    lines = []
+    for i in range(first, last):
+        url = urls[i % len(urls)]
+        offset = i / rate
+        created = int(start + offset)
+        headers = make_signed_headers(
+            method=_worker['method'],
+            url=url,
+            kid=_worker['kid'],
+            sig_agent_url=_worker['sig_agent_url'],
+            privkey_pem=_worker['private_key'],
+            created=created,
+            expires=created + _worker['window'],
+        )
+        lines.append(format_request(
+            _worker['fmt'], _worker['method'], url, headers, int(offset * 1000)
+        ))
+    lines.append('')
+    return '\n'.join(lines), _export_profile()
+
+
+def generate_corpus(
+    urls: List[str],
+    config: Dict[str, str],
+    rate: float,
+    duration: float,
+    start: Optional[float] = None,
+    method: str = 'GET',
+    window: int = 300,
+    fmt: str = 'vegeta',
+    workers: Optional[int] = None,
+    profiler: Optional[RunProfiler] = None
+) -> Iterator[str]:
+    """
+    Generate a timestamp-staggered corpus of signed requests.
+
+    URLs are used round-robin. Chunks are yielded in schedule order.
+
+    Args:
+        urls: URLs to sign requests for
+        config: Configuration dict from load_config()
+        rate: Requests per second the load generator will send
+        duration: Length of the load test in seconds
+        start: Unix time the load test starts (default: now)
+        method: HTTP method to sign
+        window: Signature validity in seconds (max 300)
+        fmt: Output format, one of FORMATS
+        workers: Number of signing processes (default: CPU count)
+        profiler: If given, workers are profiled and merged into it
+
+    Yields:
+        Newline-terminated blocks of serialized requests
+    """
+    if start is None:
+        start = time.time()
+
+    total = int(rate * duration)
+    chunks = [
+        (first, min(first + CHUNK_SIZE, total))
+        for first in range(0, total, CHUNK_SIZE)
+    ]
+
+    with multiprocessing.Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(
+            urls, method.upper(), rate, start, window, fmt, config,
+            profiler is not None,
+        ),
+    ) as pool:
+        for block, profile_data in pool.imap(_sign_chunk, chunks):
+            if profile_data is not None:
+                profiler.merge(profile_data)
+            yield block
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='OpenBotAuth Corpus Export - Pre-sign requests for load generators',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # 10 minutes at 500 req/s as vegeta targets, starting in 30s
+  python export_corpus.py --urls urls.txt --rate 500 --duration 600 \\
+      --start-delay 30 --output corpus.json
+  vegeta attack -format=json -rate=500 -duration=600s < corpus.json
+
+  # Generic JSON Lines with scheduled offsets (for k6 or wrk scripts)
+  python export_corpus.py --urls urls.txt --rate 100 --duration 60 --format jsonl
+
+  # Profile signing across all workers
+  python export_corpus.py --urls urls.txt --rate 1000 --duration 60 \\
+      --output corpus.json --profile
+        """
+    )
+
+    parser.add_argument(
+        '--urls',
+        type=str,
+        required=True,
+        help="File with one URL per line ('-' for stdin)"
+    )
+
+    parser.add_argument(
+        '--rate',
+        type=float,
+        required=True,
+        help='Requests per second the load generator will send'
+    )
+
+    parser.add_argument(
+        '--duration',
+        type=float,
+        required=True,
+        help='Load test duration in seconds'
+    )
+
+    parser.add_argument(
+        '--start-delay',
+        type=float,
+        default=0.0,
+        help='Seconds from now until the load test starts (default: 0)'
+    )
+
+    parser.add_argument(
+        '--window',
+        type=int,
+        default=300,
+        help='Signature validity window in seconds, max 300 (default: 300)'
+    )
+
+    parser.add_argument(
+        '--method',
+        type=str,
+        default='GET',
+        help='HTTP method to sign (default: GET)'
+    )
+
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='vegeta',
+        help='Output format (default: vegeta)'
+    )
+
+    parser.add_argument(
+        '--output', '-o',
+        type=str,
+        default='-',
+        help="Output file ('-' for stdout, the default)"
+    )
+
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        default=None,
+        help='Number of signing processes (default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='profile.json',
+        metavar='PATH',
+        help='Profile all workers and write a merged JSON report (default: profile.json)'
+    )
+
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.duration <= 0:
+        print("❌ Error: --rate and --duration must be positive", file=sys.stderr)
+        sys.exit(1)
+
+    total = int(args.rate * args.duration)
+    if total < 1:
+        print("❌ Error: --rate * --duration must be at least 1 request", file=sys.stderr)
+        sys.exit(1)
+
+    if not 0 < args.window <= 300:
+        print("❌ Error: --window must be between 1 and 300 seconds", file=sys.stderr)
+        sys.exit(1)
+
+    if args.workers is not None and args.workers < 1:
+        print("❌ Error: --workers must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    if not args.profile:
+        run(args)
+        return
+
+    profiler = RunProfiler()
+    profiler.start()
+    try:
+        run(args, profiler)
+    finally:
+        finish(profiler, args.profile)
+
+
+def run(args: argparse.Namespace, profiler: Optional[RunProfiler] = None):
+    """Export the corpus for parsed and range-checked CLI arguments."""
+    total = int(args.rate * args.duration)
+    config = load_config()
+    urls = read_urls(args.urls)
+
+    if not urls:
+        print("❌ Error: No URLs to sign", file=sys.stderr)
+        sys.exit(1)
+
+    errors = []
+    if not config['private_key_pem']:
+        errors.append("OBA_PRIVATE_KEY_PEM not set")
+    if not config['kid']:
+        errors.append("OBA_KID not set")
+    if not config['sig_agent_url']:
+        errors.append("OBA_SIGNATURE_AGENT_URL not set")
+
+    if config['private_key_pem']:
+        try:
+            with phase('pem_parse'):
+                parse_pem_private_key(config['private_key_pem'])
+        except ValueError as e:
+            errors.append(f"OBA_PRIVATE_KEY_PEM invalid: {e}")
+
+    if errors:
+        print("❌ Configuration errors:", file=sys.stderr)
+        for error in errors:
+            print(f"  • {error}", file=sys.stderr)
+        sys.exit(1)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    started = time.perf_counter()
+    try:
+        for block in generate_corpus(
+            urls, config,
+            rate=args.rate,
+            duration=args.duration,
+            start=time.time() + args.start_delay,
+            method=args.method,
+            window=args.window,
+            fmt=args.format,
+            workers=args.workers,
+            profiler=profiler,
+        ):
+            out.write(block)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"📦 Signed {total:,} requests in {elapsed:.2f}s "
+        f"({total / elapsed if elapsed else 0:,.0f} sig/s)",
+        file=sys.stderr
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Cheap gating probes for OpenBotAuth origins
+
+Classifies how an origin gates a URL (allow, teaser, deny, payment required)
+without downloading the body. A probe sends a HEAD request, or a GET with
+`Range: bytes=0-0`, signed for the method actually sent, and classifies from
+X-OBA-Decision and the status code. Only when the decision header is missing
+on a 2xx response does it fall back to the body-size heuristic, using
+Content-Length/Content-Range (probes send `Accept-Encoding: identity`, so these
+are decoded sizes), or a streamed read that stops as soon as it passes
+TEASER_MAX_BYTES.
+"""
+
+from typing import Dict, Optional
+
+import httpx
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from demo_agent import TEASER_MAX_BYTES, send_signed, send_unsigned
+
+
+PROBE_METHODS = ('head', 'range')
+
+# Statuses meaning the origin does not support HEAD; retry as a Range GET
+_HEAD_UNSUPPORTED = (405, 501)
+
+
+def classify(status: int, decision: Optional[str], size: Optional[int] = None) -> str:
+    """
+    Classify an origin's gating decision from response metadata.
+
+    Mirrors the labels print_response() derives from a full download. A
+    teaser reported by X-OBA-Decision ('teaser') is kept apart from one
+    guessed from a small body ('teaser_heuristic').
+
+    Args:
+        status: HTTP status code
+        decision: X-OBA-Decision header value, if any
+        size: Full body size in bytes, if known (only used without a decision)
+
+    Returns:
+        One of 'allow', 'teaser', 'deny', 'payment_required',
+        'teaser_heuristic' (2xx with no decision and a body smaller than
+        TEASER_MAX_BYTES), 'unenforced' (2xx with no decision and a
+        full-size body) or 'error'
+    """
+    decision = (decision or '').lower()
+    if decision in ('allow', 'teaser', 'deny'):
+        return decision
+    if status == 402:
+        return 'payment_required'
+    if status in (200, 206):
+        if size is not None and size < TEASER_MAX_BYTES:
+            return 'teaser_heuristic'
+        return 'unenforced'
+    return 'error'
+
+
+def _body_size(response: httpx.Response) -> Optional[int]:
+    """
+    Full body size from Content-Range (206) or Content-Length, if present.
+
+    Both headers give the encoded size, so they are ignored when the origin
+    applied a Content-Encoding despite the identity request.
+    """
+    if response.headers.get('content-encoding', 'identity').lower() != 'identity':
+        return None
+
+    if response.status_code == 206:
+        total = response.headers.get('content-range', '').rpartition('/')[2]
+        return int(total) if total.isdigit() else None
+
+    length = response.headers.get('content-length', '')
+    return int(length) if length.isdigit() else None
+
+
+def _read_bounded(response: httpx.Response, limit: int) -> int:
+    """Read at most just past limit bytes of a streamed body, then close it."""
+    read = 0
+    try:
+        for chunk in response.iter_bytes():
+            read += len(chunk)
+            if read > limit:
+                break
+    finally:
+        response.close()
+    return read
+
+
+def probe(
+    url: str,
+    mode: str,
+    config: Optional[Dict[str, str]] = None,
+    method: str = 'head',
+    client: Optional[httpx.Client] = None,
+    private_key: Optional[ed25519.Ed25519PrivateKey] = None,
+    follow_cross_authority: bool = True
+) -> Dict:
+    """
+    Probe how an origin gates a URL without downloading the body.
+
+    Args:
+        url: URL to probe
+        mode: 'unsigned' or 'signed'
+        config: Configuration dict with keys (required for signed mode)
+        method: 'head' or 'range' (HEAD falls back to range on 405/501)
+        client: Optional pooled httpx Client to reuse (default: one-shot client)
+        private_key: Optional pre-parsed key (default: parse config PEM per request)
+        follow_cross_authority: Follow a signed redirect to another host
+            (see send_signed)
+
+    Returns:
+        Dict with method, status, decision, classification, size (body size
+        if it was needed; a lower bound when a capped read hit the limit),
+        bytes_read (body bytes downloaded) and, for a redirect, location
+    """
+    if client is None:
+        with httpx.Client(follow_redirects=False, timeout=10.0) as client:
+            return probe(
+                url, mode, config, method, client, private_key,
+                follow_cross_authority
+            )
+
+    def send(http_method: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        # Ask for the unencoded body so length headers match TEASER_MAX_BYTES
+        headers = {'Accept-Encoding': 'identity', **(headers or {})}
+        if mode == 'signed':
+            return send_signed(
+                client, http_method, url, config, private_key,
+                headers=headers, stream=True,
+                follow_cross_authority=follow_cross_authority
+            )
+        return send_unsigned(client, http_method, url, headers=headers, stream=True)
+
+    response = None
+    if method == 'head':
+        response = send('HEAD')
+        response.close()
+        if response.status_code in _HEAD_UNSUPPORTED:
+            method = 'range'
+
+    if method == 'range':
+        response = send('GET', {'Range': 'bytes=0-0'})
+
+    result = {
+        'method': 'HEAD' if method == 'head' else 'GET (Range: bytes=0-0)',
+        'status': response.status_code,
+        'decision': response.headers.get('x-oba-decision'),
+        'size': None,
+        'bytes_read': 0,
+    }
+    if response.is_redirect:
+        result['location'] = response.headers.get('location')
+
+    # The size heuristic is only needed for a 2xx without a decision header
+    if result['decision'] is None and response.status_code in (200, 206):
+        size = _body_size(response)
+        if size is None and response.status_code == 200 and method == 'range':
+            # Range ignored: the streamed body is the full resource
+            size = _read_bounded(response, TEASER_MAX_BYTES)
+            result['bytes_read'] = size
+        elif size is None:
+            partial = send('GET')
+            size = _read_bounded(partial, TEASER_MAX_BYTES)
+            result['bytes_read'] = size
+        result['size'] = size
+
+    response.close()
+    result['classification'] = classify(
+        result['status'], result['decision'], result['size']
+    )
+    return result
@@ -0,0 +1,385 @@
+"""
+Built-in profiling for OpenBotAuth demo runs
+
+Captures cProfile call stats, tracemalloc top allocators and per-phase
+wall-clock timings, then writes a JSON report plus a compact terminal summary.
+
+Instrumented code calls phase() and request_extensions(); both are no-ops
+unless a RunProfiler has been started in the current process. The signing
+phases are timed by wrapping signed_fetch's functions while a profiler runs,
+so signed_fetch itself stays free of profiling code.
+"""
+
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+import signed_fetch
+
+
+# Phases in the order a request goes through them (used for report ordering)
+PHASES = (
+    'config_load',
+    'pem_parse',
+    'base_string',
+    'sign',
+    'connect',
+    'transfer',
+    'text_extract',
+)
+
+# httpcore trace events counted as connection setup; other events are transfer
+_CONNECT_EVENTS = (
+    'connection.connect_tcp',
+    'connection.connect_unix_socket',
+    'connection.start_tls',
+)
+
+_active: Optional['RunProfiler'] = None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a block under the given phase name if profiling is active."""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(name, time.perf_counter() - started)
+
+
+def request_extensions() -> Dict:
+    """
+    httpx request extensions for the active profiler.
+
+    Returns:
+        {'trace': callback} timing this request's connect/transfer, or {}
+    """
+    if _active is None:
+        return {}
+    return {'trace': _RequestTrace(_active)}
+
+
+class _RequestTrace:
+    """
+    httpcore trace callback for a single request.
+
+    Sums the request's trace events and records one 'transfer' sample per
+    request, plus one 'connect' sample if it opened a new connection.
+    """
+
+    def __init__(self, profiler: 'RunProfiler'):
+        self.profiler = profiler
+        self._started: Dict[str, float] = {}
+        self._connect: Optional[float] = None
+        self._transfer: Optional[float] = None
+        self._recorded = False
+
+    def __call__(self, event_name: str, info: Dict):
+        prefix, _, stage = event_name.rpartition('.')
+        if stage == 'started':
+            self._started[prefix] = time.perf_counter()
+            return
+        if stage not in ('complete', 'failed'):
+            return
+
+        started = self._started.pop(prefix, None)
+        if started is not None and prefix != 'connection.close':
+            elapsed = time.perf_counter() - started
+            if prefix in _CONNECT_EVENTS:
+                self._connect = (self._connect or 0.0) + elapsed
+            else:
+                self._transfer = (self._transfer or 0.0) + elapsed
+
+        # A request ends when its response is closed, or at its first failure
+        if stage == 'failed' or prefix.endswith('.response_closed'):
+            self._record()
+
+    def _record(self):
+        if self._recorded:
+            return
+        self._recorded = True
+        if self._connect is not None:
+            self.profiler.record('connect', self._connect)
+        if self._transfer is not None:
+            self.profiler.record('transfer', self._transfer)
+
+
+def _timed(profiler: 'RunProfiler', name: str, func: Callable) -> Callable:
+    """Wrap func so each call is recorded as one sample of a phase."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.record(name, time.perf_counter() - started)
+    return wrapper
+
+
+def _instrument_signing(profiler: 'RunProfiler') -> Dict[str, Callable]:
+    """
+    Time signed_fetch's PEM parse, base-string build and sign steps.
+
+    make_signed_headers() looks these up as module globals, so replacing them
+    covers every signing path. Code that imported parse_pem_private_key by
+    name must time its own calls with phase('pem_parse').
+
+    Returns:
+        The original functions, for _restore_signing()
+    """
+    originals = {
+        name: getattr(signed_fetch, name)
+        for name in ('parse_pem_private_key', 'build_signature_base', 'sign_ed25519')
+    }
+    parse_pem = _timed(profiler, 'pem_parse', originals['parse_pem_private_key'])
+    sign = _timed(profiler, 'sign', originals['sign_ed25519'])
+
+    def sign_ed25519(message, private_key_pem):
+        # Parse outside the 'sign' timer so PEM parsing is not counted twice
+        if isinstance(private_key_pem, str):
+            private_key_pem = parse_pem(private_key_pem)
+        return sign(message, private_key_pem)
+
+    signed_fetch.parse_pem_private_key = parse_pem
+    signed_fetch.build_signature_base = _timed(
+        profiler, 'base_string', originals['build_signature_base']
+    )
+    signed_fetch.sign_ed25519 = functools.wraps(originals['sign_ed25519'])(sign_ed25519)
+    return originals
+
+
+def _restore_signing(originals: Dict[str, Callable]):
+    """Undo _instrument_signing()."""
+    for name, func in originals.items():
+        setattr(signed_fetch, name, func)
+
+
+class _RawStats:
+    """Adapter so pstats.Stats can load a stats dict shipped from a worker."""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class RunProfiler:
+    """
+    Collects cProfile, tracemalloc and per-phase timings for one process.
+
+    Worker processes export() their data and the parent merge()s it, so a
+    multi-process run produces a single report. A worker may export several
+    times (e.g. once per pool task); processes counts distinct workers.
+    """
+
+    def __init__(self, top: int = 15):
+        self.top = top
+        self.wall = 0.0
+        self.processes = 1
+        self.peak_memory = 0
+        self._merged_pids: Set[int] = set()
+        self._phases: Dict[str, List[float]] = {}
+        self._allocations: Dict[str, List[int]] = {}
+        self._stats = pstats.Stats()
+        self._profile: Optional[cProfile.Profile] = None
+        self._signing_originals: Dict[str, Callable] = {}
+        self._started = 0.0
+
+    def start(self):
+        """Enable collection and make this the active profiler."""
+        global _active
+        if _active is not None:
+            # Inherited from a forking parent: its cProfile is still enabled
+            # (3.12+ allows only one) and its tracemalloc traces would be
+            # reported again by this process
+            _active._discard()
+            _active = None
+        tracemalloc.start()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            tracemalloc.stop()
+            raise
+        self._profile = profile
+        self._signing_originals = _instrument_signing(self)
+        self._started = time.perf_counter()
+        _active = self
+
+    @property
+    def running(self) -> bool:
+        """Whether start() has succeeded and stop() has not been called yet."""
+        return self._profile is not None
+
+    def stop(self):
+        """Disable collection and snapshot cProfile and tracemalloc data."""
+        global _active
+        self._profile.disable()
+        _active = None
+        _restore_signing(self._signing_originals)
+        self.wall += time.perf_counter() - self._started
+
+        # Snapshot before building pstats so the profiler's own bookkeeping
+        # does not show up as a top allocator
+        snapshot = tracemalloc.take_snapshot()
+        self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+        ))
+        for stat in snapshot.statistics('lineno')[:self.top * 4]:
+            frame = stat.traceback[0]
+            self._add_allocation(f"{frame.filename}:{frame.lineno}", stat.size, stat.count)
+
+        self._profile.create_stats()
+        if self._profile.stats:
+            self._stats.add(pstats.Stats(_RawStats(self._profile.stats)))
+        self._profile = None
+
+    def _discard(self):
+        """Disable collection without keeping any data."""
+        self._profile.disable()
+        self._profile = None
+        _restore_signing(self._signing_originals)
+        tracemalloc.stop()
+
+    def record(self, name: str, seconds: float):
+        """Add one timing sample to a phase."""
+        self._phases.setdefault(name, []).append(seconds)
+
+    def export(self) -> Dict:
+        """Picklable snapshot of collected data, for merge() in another process."""
+        return {
+            'pid': os.getpid(),
+            'phases': self._phases,
+            'allocations': self._allocations,
+            'stats': self._stats.stats,
+            'peak_memory': self.peak_memory,
+        }
+
+    def merge(self, data: Dict):
+        """Fold an export() from a worker process into this profiler."""
+        for name, samples in data['phases'].items():
+            self._phases.setdefault(name, []).extend(samples)
+        for location, (size, count) in data['allocations'].items():
+            self._add_allocation(location, size, count)
+        if data['stats']:
+            self._stats.add(pstats.Stats(_RawStats(data['stats'])))
+        self.peak_memory = max(self.peak_memory, data['peak_memory'])
+        self._merged_pids.add(data['pid'])
+        self.processes = 1 + len(self._merged_pids)
+
+    def report(self) -> Dict:
+        """Build the machine-readable report."""
+        phases = {}
+        for name in sorted(self._phases, key=_phase_order):
+            samples = self._phases[name]
+            phases[name] = {
+                'count': len(samples),
+                'total_ms': round(sum(samples) * 1000, 3),
+                'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+                'max_ms': round(max(samples) * 1000, 3),
+            }
+
+        functions = []
+        for func, (cc, nc, tt, ct, _) in self._stats.stats.items():
+            filename, lineno, funcname = func
+            functions.append({
+                'function': funcname,
+                'location': f"{filename}:{lineno}",
+                'ncalls': nc,
+                'tottime_ms': round(tt * 1000, 3),
+                'cumtime_ms': round(ct * 1000, 3),
+            })
+        functions.sort(key=lambda f: f['cumtime_ms'], reverse=True)
+
+        allocations = [
+            {'location': location, 'size_kb': round(size / 1024, 1), 'count': count}
+            for location, (size, count) in sorted(
+                self._allocations.items(), key=lambda item: item[1][0], reverse=True
+            )
+        ]
+
+        return {
+            'wall_ms': round(self.wall * 1000, 3),
+            'processes': self.processes,
+            'peak_memory_kb': round(self.peak_memory / 1024, 1),
+            'phases': phases,
+            'top_functions': functions[:self.top],
+            'top_allocations': allocations[:self.top],
+        }
+
+    def write_report(self, path: str) -> Dict:
+        """Write the JSON report to path and return it."""
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def print_summary(self, report: Dict, path: str, limit: int = 5):
+        """Print a compact summary of a report to stderr."""
+        out = sys.stderr
+        print(f"\n⏱️  Profile (wall {report['wall_ms']:.1f} ms, "
+              f"peak {report['peak_memory_kb']:,.1f} KiB, "
+              f"{report['processes']} process(es))", file=out)
+
+        print(f"  {'phase':<14}{'calls':>7}{'total ms':>12}{'mean ms':>10}", file=out)
+        for name, stats in report['phases'].items():
+            print(f"  {name:<14}{stats['count']:>7}{stats['total_ms']:>12.2f}"
+                  f"{stats['mean_ms']:>10.3f}", file=out)
+
+        print("\n🔥 Top functions (cumulative):", file=out)
+        for func in report['top_functions'][:limit]:
+            print(f"  {func['cumtime_ms']:>10.2f} ms  {func['function']} "
+                  f"({_short_location(func['location'])})", file=out)
+
+        print("\n💾 Top allocators:", file=out)
+        for alloc in report['top_allocations'][:limit]:
+            print(f"  {alloc['size_kb']:>10.1f} KiB  "
+                  f"{_short_location(alloc['location'])} (x{alloc['count']})", file=out)
+
+        print(f"\n📝 Profile report written to {path}", file=out)
+
+    def _add_allocation(self, location: str, size: int, count: int):
+        totals = self._allocations.setdefault(location, [0, 0])
+        totals[0] += size
+        totals[1] += count
+
+
+def finish(profiler: RunProfiler, path: str):
+    """Stop a started profiler, write its report and print the summary."""
+    profiler.stop()
+    report = profiler.write_report(path)
+    profiler.print_summary(report, path)
+
+
+def _phase_order(name: str):
+    return (PHASES.index(name) if name in PHASES else len(PHASES), name)
+
+
+def _short_location(location: str) -> str:
+    """Trim a file:line location to the last two path components."""
+    path, _, lineno = location.rpartition(':')
+    if not path:
+        return location
+    parts = path.replace(os.sep, '/').split('/')
+    return f"{'/'.join(parts[-2:])}:{lineno}"
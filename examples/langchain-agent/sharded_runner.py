@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+OpenBotAuth Sharded Runner
+
+Fetches a list of URLs across N worker processes. URLs are partitioned by a
+stable hash of their normalized authority, so every host is owned by exactly
+one worker. Each worker decodes the private key once and keeps its own pooled
+httpx Client and per-host rate-limit state, which keeps connection reuse and
+politeness per-host without any cross-process locking.
+
+Results are streamed back to the parent as JSON Lines while workers run.
+
+The per-host rate limit only covers hosts the worker owns, so redirects to a
+different authority are not followed: the 3xx is reported with its
+`location`, and the target can be fetched by adding it to the URL list.
+Same-authority redirects are still followed (re-signed in signed mode).
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import queue
+import sys
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from demo_agent import fetch_signed, fetch_unsigned, load_config
+from probe import PROBE_METHODS, probe
+from profiling import RunProfiler, finish, phase
+from signed_fetch import normalize_authority, parse_pem_private_key
+
+
+# Sentinel a worker puts on the result queue when its shard is done
+_SHARD_DONE = '__shard_done__'
+
+# Seconds to wait for a result before checking whether workers are still alive
+_POLL_INTERVAL = 1.0
+
+
+def shard_for_url(url: str, num_shards: int) -> int:
+    """
+    Map a URL to a shard index by hashing its normalized authority.
+
+    Uses SHA-1 rather than hash() so the mapping is stable across processes
+    (PYTHONHASHSEED randomizes str hashes per interpreter).
+
+    Args:
+        url: Full URL
+        num_shards: Number of shards (worker processes)
+
+    Returns:
+        Shard index in [0, num_shards)
+    """
+    authority = normalize_authority(url)
+    digest = hashlib.sha1(authority.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % num_shards
+
+
+def partition_urls(
+    urls: List[str],
+    num_shards: int
+) -> Tuple[List[List[str]], List[Tuple[str, str]]]:
+    """
+    Partition URLs into shards by authority, preserving input order per shard.
+
+    Args:
+        urls: URLs to fetch
+        num_shards: Number of shards (worker processes)
+
+    Returns:
+        Tuple of (num_shards URL lists, [(url, error)] for URLs whose
+        authority cannot be parsed, e.g. a port out of range)
+    """
+    shards: List[List[str]] = [[] for _ in range(num_shards)]
+    rejected: List[Tuple[str, str]] = []
+    for url in urls:
+        try:
+            shard_index = shard_for_url(url, num_shards)
+        except ValueError as e:
+            rejected.append((url, f"{type(e).__name__}: {e}"))
+            continue
+        shards[shard_index].append(url)
+    return shards, rejected
+
+
+class HostRateLimiter:
+    """
+    Per-host minimum interval between requests.
+
+    Only ever used inside a single worker process; sharding by authority
+    guarantees no other process talks to the same host.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._last_request: Dict[str, float] = {}
+
+    def ready_at(self, authority: str) -> float:
+        """Monotonic time from which a request to this authority is allowed."""
+        last = self._last_request.get(authority)
+        if last is None:
+            return float('-inf')
+        return last + self.min_interval
+
+    def schedule(self, urls: List[str]) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (url, authority) pairs, each once its host allows a request.
+
+        URLs are queued per host in input order. The host that has been
+        ready the longest goes next, so a host inside its interval is
+        skipped rather than waited on and one busy host does not stall the
+        others. Sleeps only when no host is ready.
+
+        Args:
+            urls: URLs to schedule (authorities must parse)
+
+        Yields:
+            (url, authority) tuples; the request counts as sent on yield
+        """
+        if self.min_interval <= 0:
+            for url in urls:
+                yield url, normalize_authority(url)
+            return
+
+        pending: Dict[str, Deque[str]] = {}
+        for url in urls:
+            pending.setdefault(normalize_authority(url), deque()).append(url)
+
+        while pending:
+            # min() keeps the first of equal entries; re-inserting a served
+            # host at the end makes never-used hosts take turns in order
+            authority = min(pending, key=self.ready_at)
+            delay = self.ready_at(authority) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_request[authority] = time.monotonic()
+
+            host_urls = pending.pop(authority)
+            yield host_urls.popleft(), authority
+            if host_urls:
+                pending[authority] = host_urls
+
+
+def _run_shard(
+    shard_index: int,
+    urls: List[str],
+    mode: str,
+    config: Dict[str, str],
+    min_interval: float,
+    results: multiprocessing.Queue,
+    profile: bool = False,
+    probe_method: Optional[str] = None
+):
+    """
+    Worker process body: fetch every URL in one shard and stream results.
+
+    Args:
+        shard_index: Index of this shard
+        urls: URLs owned by this shard
+        mode: 'unsigned' or 'signed'
+        config: Configuration dict from load_config()
+        min_interval: Minimum seconds between requests to the same host
+        results: Queue that receives one dict per URL, then _SHARD_DONE
+        profile: Profile this worker and send its data with _SHARD_DONE
+        probe_method: If set ('head' or 'range'), probe instead of fetching
+    """
+    # Keep the parent's stdout a clean JSON Lines stream (fetch_signed
+    # prints redirect notices)
+    sys.stdout = sys.stderr
+
+    profiler = None
+    try:
+        if profile:
+            profiler = RunProfiler()
+            profiler.start()
+
+        private_key = None
+        if mode == 'signed':
+            # Decode once per worker instead of once per request
+            with phase('pem_parse'):
+                private_key = parse_pem_private_key(config['private_key_pem'])
+
+        limiter = HostRateLimiter(min_interval)
+
+        with httpx.Client(follow_redirects=False, timeout=10.0) as client:
+            for url, authority in limiter.schedule(urls):
+
+                record = {
+                    'url': url,
+                    'authority': authority,
+                    'shard': shard_index,
+                    'mode': mode,
+                }
+                started = time.perf_counter()
+                try:
+                    if probe_method:
+                        record.update(probe(
+                            url, mode, config, method=probe_method,
+                            client=client, private_key=private_key,
+                            follow_cross_authority=False
+                        ))
+                    else:
+                        if mode == 'unsigned':
+                            response = fetch_unsigned(url, client=client)
+                        else:
+                            response = fetch_signed(
+                                url, config, client=client, private_key=private_key,
+                                follow_cross_authority=False
+                            )
+                        record.update({
+                            'status': response.status_code,
+                            'decision': response.headers.get('x-oba-decision'),
+                            'bytes': len(response.content),
+                        })
+                        if response.is_redirect:
+                            record['location'] = response.headers.get('location')
+                except Exception as e:
+                    # Any per-URL failure (network, invalid URL, IDNA...) is
+                    # reported for that URL; the rest of the shard still runs
+                    record['error'] = f"{type(e).__name__}: {e}"
+                record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+                results.put(record)
+    finally:
+        profile_data = None
+        if profiler is not None and profiler.running:
+            profiler.stop()
+            profile_data = profiler.export()
+        results.put((_SHARD_DONE, shard_index, profile_data))
+
+
+def _unreported(shard_urls: List[str], reported: Counter) -> List[str]:
+    """URLs of a shard with no result yet (duplicates counted separately)."""
+    remaining = Counter(reported)
+    missing = []
+    for url in shard_urls:
+        if remaining[url] > 0:
+            remaining[url] -= 1
+        else:
+            missing.append(url)
+    return missing
+
+
+def run_sharded(
+    urls: List[str],
+    mode: str,
+    config: Dict[str, str],
+    workers: Optional[int] = None,
+    min_interval: float = 0.0,
+    profiler: Optional[RunProfiler] = None,
+    probe_method: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Fetch URLs across worker processes, yielding results as they arrive.
+
+    Results are yielded in completion order, not input order. If a worker
+    dies (OOM kill, signal, crash) or finishes without a result for some of
+    its URLs, an error record is yielded for each of them. URLs whose
+    authority cannot be parsed get an error record without being fetched.
+
+    Args:
+        urls: URLs to fetch
+        mode: 'unsigned' or 'signed'
+        config: Configuration dict from load_config()
+        workers: Number of worker processes (default: CPU count)
+        min_interval: Minimum seconds between requests to the same host
+        profiler: If given, workers are profiled and merged into it
+        probe_method: If set ('head' or 'range'), probe gating instead of
+            downloading bodies (see probe.probe())
+
+    Yields:
+        One result dict per URL
+    """
+    num_shards = multiprocessing.cpu_count() if workers is None else workers
+    if num_shards < 1:
+        raise ValueError("workers must be at least 1")
+    shards, rejected = partition_urls(urls, num_shards)
+
+    # Unparseable URLs are reported up front instead of aborting the batch
+    for url, error in rejected:
+        yield {
+            'url': url,
+            'authority': None,
+            'shard': None,
+            'mode': mode,
+            'error': error,
+        }
+
+    results: multiprocessing.Queue = multiprocessing.Queue()
+    processes: Dict[int, multiprocessing.Process] = {}
+    for shard_index, shard_urls in enumerate(shards):
+        if not shard_urls:
+            continue
+        process = multiprocessing.Process(
+            target=_run_shard,
+            args=(
+                shard_index, shard_urls, mode, config, min_interval, results,
+                profiler is not None, probe_method,
+            ),
+            daemon=True,
+        )
+        process.start()
+        processes[shard_index] = process
+
+    # Stream until every started worker has reported done or died
+    pending = dict(processes)
+    reported = {shard_index: Counter() for shard_index in processes}
+
+    def missing_records(shard_index: int, error: str) -> Iterator[Dict]:
+        for url in _unreported(shards[shard_index], reported[shard_index]):
+            yield {
+                'url': url,
+                'authority': normalize_authority(url),
+                'shard': shard_index,
+                'mode': mode,
+                'error': error,
+            }
+
+    while pending:
+        try:
+            item = results.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            # Nothing arrived for a full interval, so anything a dead worker
+            # managed to send has been received already
+            for shard_index, process in list(pending.items()):
+                if process.is_alive():
+                    continue
+                del pending[shard_index]
+                yield from missing_records(
+                    shard_index,
+                    f"Worker exited with code {process.exitcode} before reporting"
+                )
+            continue
+
+        if isinstance(item, tuple) and item[0] == _SHARD_DONE:
+            shard_index = item[1]
+            if pending.pop(shard_index, None) is not None:
+                yield from missing_records(
+                    shard_index, "Worker finished without a result for this URL"
+                )
+            if profiler is not None and item[2] is not None:
+                profiler.merge(item[2])
+            continue
+        reported[item['shard']][item['url']] += 1
+        yield item
+
+    for process in processes.values():
+        process.join()
+
+
+def read_urls(path: str) -> List[str]:
+    """Read one URL per line, skipping blanks and # comments ('-' for stdin)."""
+    handle = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        return [
+            line.strip() for line in handle
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description='OpenBotAuth Sharded Runner - Fetch many URLs across processes',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Signed fetch of every URL in urls.txt on all cores
+  python sharded_runner.py --mode signed --urls urls.txt
+
+  # 4 workers, at most one request per second to any single host
+  python sharded_runner.py --mode signed --urls urls.txt --workers 4 --min-interval 1.0
+
+  # Gating audit only: signed HEAD probes, no body downloads
+  python sharded_runner.py --mode signed --urls urls.txt --probe
+
+  # Profile every worker and write one merged report to profile.json
+  python sharded_runner.py --mode signed --urls urls.txt --profile
+        """
+    )
+
+    parser.add_argument(
+        '--mode',
+        choices=['unsigned', 'signed'],
+        required=True,
+        help='Request mode: unsigned (teaser) or signed (full access)'
+    )
+
+    parser.add_argument(
+        '--urls',
+        type=str,
+        required=True,
+        help="File with one URL per line ('-' for stdin)"
+    )
+
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        default=None,
+        help='Number of worker processes (default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--min-interval',
+        type=float,
+        default=0.0,
+        help='Minimum seconds between requests to the same host (default: 0)'
+    )
+
+    parser.add_argument(
+        '--probe',
+        nargs='?',
+        choices=PROBE_METHODS,
+        const='head',
+        help='Only classify gating via HEAD or Range: bytes=0-0 (default: head)'
+    )
+
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='profile.json',
+        metavar='PATH',
+        help='Profile all workers and write a merged JSON report (default: profile.json)'
+    )
+
+    args = parser.parse_args()
+
+    if args.workers is not None and args.workers < 1:
+        print("❌ Error: --workers must be at least 1", file=sys.stderr)
+        sys.exit(1)
+
+    if not args.profile:
+        run(args)
+        return
+
+    profiler = RunProfiler()
+    profiler.start()
+    try:
+        run(args, profiler)
+    finally:
+        finish(profiler, args.profile)
+
+
+def run(args: argparse.Namespace, profiler: Optional[RunProfiler] = None):
+    """Run the sharded fetch for parsed CLI arguments (exits with the result code)."""
+    config = load_config()
+    urls = read_urls(args.urls)
+
+    if not urls:
+        print("❌ Error: No URLs to fetch", file=sys.stderr)
+        sys.exit(1)
+
+    if args.mode == 'signed':
+        errors = []
+        if not config['private_key_pem']:
+            errors.append("OBA_PRIVATE_KEY_PEM not set")
+        if not config['kid']:
+            errors.append("OBA_KID not set")
+        if not config['sig_agent_url']:
+            errors.append("OBA_SIGNATURE_AGENT_URL not set")
+
+        if config['private_key_pem']:
+            # Fail fast here rather than in every worker
+            try:
+                parse_pem_private_key(config['private_key_pem'])
+            except ValueError as e:
+                errors.append(f"OBA_PRIVATE_KEY_PEM invalid: {e}")
+
+        if errors:
+            print("❌ Configuration errors for signed mode:", file=sys.stderr)
+            for error in errors:
+                print(f"  • {error}", file=sys.stderr)
+            sys.exit(1)
+
+    started = time.perf_counter()
+    total = 0
+    failed = 0
+    for record in run_sharded(
+        urls, args.mode, config,
+        workers=args.workers, min_interval=args.min_interval, profiler=profiler,
+        probe_method=args.probe
+    ):
+        total += 1
+        if 'error' in record:
+            # Includes URLs from a worker that died before reporting
+            failed += 1
+        print(json.dumps(record), flush=True)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"\n📊 {total} URLs in {elapsed:.2f}s "
+        f"({total / elapsed if elapsed else 0:.1f} req/s), {failed} failed",
+        file=sys.stderr
+    )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
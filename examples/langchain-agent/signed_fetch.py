@@ -8,7 +8,7 @@ and RFC 9421 HTTP Message Signatures format.
 import base64
 import secrets
 import time
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
 from urllib.parse import urlparse
 
 from cryptography.hazmat.primitives import serialization
@@ -139,18 +139,25 @@ def build_signature_base(
     return signature_base, signature_input
 
 
-def sign_ed25519(message: str, private_key_pem: str) -> str:
+def sign_ed25519(
+    message: str,
+    private_key_pem: Union[str, ed25519.Ed25519PrivateKey]
+) -> str:
     """
     Sign a message using Ed25519 private key.
     
     Args:
         message: Message to sign (UTF-8 string)
-        private_key_pem: Ed25519 private key in PEM format
+        private_key_pem: Ed25519 private key in PEM format, or an already
+            parsed Ed25519PrivateKey (skips PEM parsing on hot paths)
     
     Returns:
         Signature as base64 string (NOT base64url, per RFC 9421)
     """
-    private_key = parse_pem_private_key(private_key_pem)
+    if isinstance(private_key_pem, ed25519.Ed25519PrivateKey):
+        private_key = private_key_pem
+    else:
+        private_key = parse_pem_private_key(private_key_pem)
     
     # Sign the message
     message_bytes = message.encode('utf-8')
@@ -165,7 +172,7 @@ def make_signed_headers(
     url: str,
     kid: str,
     sig_agent_url: str,
-    privkey_pem: str,
+    privkey_pem: Union[str, ed25519.Ed25519PrivateKey],
     created: int = None,
     expires: int = None,
     nonce: str = None,
@@ -179,7 +186,7 @@ def make_signed_headers(
         url: Full URL to request
         kid: Key identifier
         sig_agent_url: Signature-Agent URL (JWKS endpoint)
-        privkey_pem: Ed25519 private key in PEM format
+        privkey_pem: Ed25519 private key in PEM format (or parsed key)
         created: Unix timestamp (default: now)
         expires: Unix timestamp (default: created + 300s)
         nonce: Nonce (default: auto-generated)